@@ -0,0 +1,134 @@
+# cython: language_level=3
+# distutils: language = c++
+# distutils: libraries = re2
+"""
+log_analyzer_fast.pyx
+Optional Cython fast path for log_analyzer.
+
+Scans a log buffer line by line with the RE2 C++ API and counts fields
+in C++ unordered_maps, entering the Python interpreter only to build
+the final Counters. Build it in place (needs Cython and libre2-dev):
+
+    cythonize -i log_analyzer_fast.pyx
+
+log_analyzer falls back to its pure-Python scanner when this module is
+not built, so building it is strictly optional.
+"""
+
+from collections import Counter
+
+from libc.string cimport memchr
+from libcpp.string cimport string
+from libcpp.unordered_map cimport unordered_map
+
+cdef extern from "re2/stringpiece.h" namespace "re2":
+    cdef cppclass StringPiece:
+        StringPiece()
+        StringPiece(const char* data, size_t size)
+
+cdef extern from "re2/re2.h" namespace "re2":
+    cdef cppclass RE2:
+        RE2(const char* pattern) except +
+        bint ok()
+        @staticmethod
+        bint PartialMatch(const StringPiece& text, const RE2& re,
+                          string* a1, string* a2, string* a3, string* a4)
+
+# Same pattern as log_analyzer.LOG_PATTERN — including the non-greedy
+# timestamp and quoted fields, which accept embedded ']' and '"' the
+# way the pure-Python path does — with only the four consumed fields
+# capturing: RE2::PartialMatch binds one output argument per capture
+# group, and a group that does not participate leaves its argument
+# empty.
+cdef const char* _PATTERN = (
+    b'^([^ ]+) [^ ]+ [^ ]+ \\[.*?\\] "(.*?)" (\\d{3}) [^ ]+'
+    b'(?: ".*?" "(.*?)")?'
+)
+
+cdef RE2* _LOG_RE = new RE2(_PATTERN)
+
+
+cdef string _request_path(const string& request):
+    """Extract the URL path from 'METHOD url PROTO', cut at '?' or '#'."""
+    cdef size_t n = request.size()
+    cdef size_t i = 0
+    cdef size_t start, end
+    cdef char c
+    while i < n and request[i] != b' ':
+        i += 1
+    if i >= n:
+        return string()
+    start = i + 1
+    end = start
+    while end < n:
+        c = request[end]
+        if c == b' ' or c == b'?' or c == b'#':
+            break
+        end += 1
+    return request.substr(start, end - start)
+
+
+cdef _to_counter(unordered_map[string, long]& counts):
+    cdef dict out = {}
+    for item in counts:
+        out[item.first.decode('ascii', 'replace')] = item.second
+    return Counter(out)
+
+
+cdef bint _is_blank(const char* line, size_t length):
+    cdef size_t i
+    cdef char c
+    for i in range(length):
+        c = line[i]
+        if c != b' ' and c != b'\t' and c != b'\r':
+            return False
+    return True
+
+
+def scan_buffer(data):
+    """
+    Drop-in replacement for log_analyzer.scan_buffer: takes a bytes
+    buffer, returns (status_counter, ip_counter, path_counter,
+    agent_counter, total, skipped).
+    """
+    cdef const unsigned char[:] buf = data
+    cdef const char* base = <const char*> &buf[0] if len(data) else NULL
+    cdef size_t size = len(data)
+    cdef size_t pos = 0
+    cdef size_t line_len
+    cdef const char* nl
+    cdef string ip, request, status, agent, path
+    cdef unordered_map[string, long] ip_counts, status_counts
+    cdef unordered_map[string, long] path_counts, agent_counts
+    cdef long total = 0
+    cdef long skipped = 0
+
+    while pos < size:
+        nl = <const char*> memchr(base + pos, b'\n', size - pos)
+        if nl is NULL:
+            line_len = size - pos
+        else:
+            line_len = nl - (base + pos)
+        if not _is_blank(base + pos, line_len):
+            if RE2.PartialMatch(StringPiece(base + pos, line_len),
+                                _LOG_RE[0],
+                                &ip, &request, &status, &agent):
+                total += 1
+                ip_counts[ip] += 1
+                status_counts[status] += 1
+                path = _request_path(request)
+                if path.empty():
+                    path = b'-'
+                path_counts[path] += 1
+                if agent.empty():
+                    agent = b'-'
+                agent_counts[agent] += 1
+            else:
+                skipped += 1
+        if nl is NULL:
+            break
+        pos += line_len + 1
+
+    return (_to_counter(status_counts), _to_counter(ip_counts),
+            _to_counter(path_counts), _to_counter(agent_counts),
+            total, skipped)
@@ -12,7 +12,10 @@ Usage examples:
 """
 
 import argparse
+import atexit
 import logging
+import logging.handlers
+import queue
 import time
 import datetime
 import random
@@ -26,32 +29,64 @@ def try_import_psutil():
     except Exception:
         return None
 
-def get_metrics_real(psutil):
-    # CPU
-    cpu = psutil.cpu_percent(interval=None)
+# Pseudo/ephemeral filesystems that should not count towards disk usage.
+SKIP_FSTYPES = frozenset(('tmpfs', 'devtmpfs', 'squashfs', 'overlay',
+                          'proc', 'sysfs'))
+
+# Partition layout rarely changes between checks, but disk_partitions()
+# re-parses /proc/mounts and allocates a namedtuple per partition on
+# every call. Cache the filtered mountpoints and refresh them at most
+# once a minute.
+PARTITIONS_TTL = 60.0
+_mountpoints_cache = (0.0, None)
+
+def get_mountpoints(psutil):
+    global _mountpoints_cache
+    now = time.monotonic()
+    stamp, mounts = _mountpoints_cache
+    if mounts is None or now - stamp > PARTITIONS_TTL:
+        mounts = [part.mountpoint for part in psutil.disk_partitions(all=False)
+                  if (part.fstype or '').lower() not in SKIP_FSTYPES]
+        _mountpoints_cache = (now, mounts)
+    return mounts
+
+def get_metrics_real(psutil, interval):
+    # CPU: sample over the whole check interval. Blocking here paces the
+    # loop and gives a deterministic sampling window — interval=None
+    # returns a meaningless 0.0 on the first call and its "since last
+    # call" window jitters with whatever else the tick does.
+    cpu = psutil.cpu_percent(interval=interval)
     # Memory
     mem = psutil.virtual_memory().percent
-    # Disk (max percent used across non-temp partitions)
+    # Disk (max percent used across non-temp partitions). statvfs gives
+    # the numbers directly without psutil's namedtuple wrapper; the
+    # percent math matches psutil.disk_usage().percent.
     max_disk = 0.0
-    for part in psutil.disk_partitions(all=False):
-        if any(skip in (part.fstype or '').lower() for skip in ('tmpfs', 'devtmpfs', 'squashfs')):
-            continue
+    for mountpoint in get_mountpoints(psutil):
         try:
-            usage = psutil.disk_usage(part.mountpoint).percent
+            st = os.statvfs(mountpoint)
+        except OSError:
+            continue
+        used = st.f_blocks - st.f_bfree
+        avail = st.f_bavail
+        if used + avail > 0:
+            usage = used / (used + avail) * 100.0
             if usage > max_disk:
                 max_disk = usage
-        except Exception:
-            continue
     # Process count
     proc_count = len(psutil.pids())
     return dict(cpu=cpu, memory=mem, disk=max_disk, processes=proc_count)
 
 def get_metrics_simulated():
-    # Reasonable random ranges; sometimes spike to trigger alerts
-    cpu = random.choice([random.uniform(5, 60), random.uniform(80, 99)])
-    mem = random.choice([random.uniform(20, 70), random.uniform(75, 95)])
-    disk = random.choice([random.uniform(30, 75), random.uniform(80, 98)])
-    processes = int(random.choice([random.uniform(50, 200), random.uniform(300, 800)]))
+    # Reasonable random ranges; roughly half the ticks spike to trigger
+    # alerts. Branching on random() draws only the chosen range, where
+    # random.choice over two uniforms evaluated both before picking one.
+    rand = random.random
+    uniform = random.uniform
+    cpu = uniform(80, 99) if rand() < 0.5 else uniform(5, 60)
+    mem = uniform(75, 95) if rand() < 0.5 else uniform(20, 70)
+    disk = uniform(80, 98) if rand() < 0.5 else uniform(30, 75)
+    processes = int(uniform(300, 800) if rand() < 0.5 else uniform(50, 200))
     return dict(cpu=cpu, memory=mem, disk=disk, processes=processes)
 
 def build_parser():
@@ -69,14 +104,24 @@ def build_parser():
 
 def setup_logger(log_file, console_only):
     logger = logging.getLogger("health")
+    if logger.handlers:
+        # Already configured; reuse the existing handlers instead of
+        # rebuilding (and reopening the log file) on repeat calls.
+        return logger
     logger.setLevel(logging.INFO)
-    logger.handlers = []
     fmt = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
     if not console_only and log_file:
         fh = logging.FileHandler(log_file)
         fh.setLevel(logging.INFO)
         fh.setFormatter(fmt)
-        logger.addHandler(fh)
+        # Drain file writes on a background thread: the monitoring tick
+        # just enqueues the record instead of blocking on disk I/O.
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, fh, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
     ch = logging.StreamHandler()
     ch.setLevel(logging.INFO)
     ch.setFormatter(fmt)
@@ -100,7 +145,7 @@ def main():
         if args.simulate:
             metrics = get_metrics_simulated()
         else:
-            metrics = get_metrics_real(psutil)
+            metrics = get_metrics_real(psutil, args.interval)
 
         cpu = metrics["cpu"]
         mem = metrics["memory"]
@@ -123,9 +168,14 @@ def main():
 
         if status:
             exceeded_any = True
-            logger.warning("ALERT: " + " | ".join(status))
-
-        if i < args.iterations:
+            if logger.isEnabledFor(logging.WARNING):
+                # %-style lazy args: the join only runs when the record
+                # is actually emitted.
+                logger.warning("ALERT: %s", " | ".join(status))
+
+        # Real metrics are paced by the blocking cpu_percent() sample;
+        # only simulated runs still need an explicit sleep.
+        if args.simulate and i < args.iterations:
             time.sleep(args.interval)
 
     if exceeded_any: